@@ -0,0 +1,125 @@
+import unittest
+import numpy as np
+import pandas as pd
+import torch
+
+from few_shot.datasets import _PackedPaths, DummyDataset, MultiDataset
+
+
+class FakeDataset(torch.utils.data.Dataset):
+    """Minimal stand-in for OmniglotDataset/MiniImageNet exposing just the attributes
+    MultiDataset relies on: target, df, _class_ids, num_classes(), __len__, __getitem__.
+    """
+    def __init__(self, target, n_classes, samples_per_class):
+        self.target = target
+        n = n_classes * samples_per_class
+        self._class_ids = np.arange(n, dtype=np.int64) % n_classes
+        self.df = pd.DataFrame({
+            'class_name': ['{}_class_{}'.format(target, c) for c in self._class_ids],
+            'filepath': ['{}/{}.png'.format(target, i) for i in range(n)],
+            'subset': 'background',
+            'id': range(n),
+            'class_id': self._class_ids,
+        })
+
+    def __len__(self):
+        return len(self.df)
+
+    def num_classes(self):
+        return len(np.unique(self._class_ids))
+
+    def __getitem__(self, item):
+        return torch.full((1,), float(item)), int(self._class_ids[item])
+
+
+class TestPackedPaths(unittest.TestCase):
+    def test_round_trip(self):
+        paths = ['images_background/Greek/character01/0394_01.png',
+                 'images_background/Greek/character01/0394_02.png',
+                 '',
+                 'images_evaluation/Ångström/δ.png']
+
+        packed = _PackedPaths(paths)
+
+        self.assertEqual(len(packed), len(paths), 'Packing must preserve the number of paths.')
+        for i, path in enumerate(paths):
+            self.assertEqual(packed[i], path, 'Indexing must decode the original path.')
+
+    def test_empty(self):
+        self.assertEqual(len(_PackedPaths([])), 0)
+
+
+class TestDummyDataset(unittest.TestCase):
+    def test_sample_layout(self):
+        samples_per_class = 10
+        n_classes = 10
+        n_features = 3
+        dataset = DummyDataset(samples_per_class=samples_per_class, n_classes=n_classes, n_features=n_features)
+
+        self.assertEqual(len(dataset), samples_per_class * n_classes)
+
+        for item in (0, 1, n_classes, len(dataset) - 1):
+            x, y = dataset[item]
+            self.assertEqual(x.shape, (n_features + 1,))
+            self.assertEqual(x.dtype, torch.float32)
+            self.assertEqual(x[0].item(), item, 'First feature must be the sample index.')
+            self.assertTrue(
+                (x[1:] == item % n_classes).all(),
+                'Remaining features must all be the class index.'
+            )
+            self.assertIsInstance(y, float)
+            self.assertEqual(y, item % n_classes)
+
+
+class TestMultiDataset(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.first = FakeDataset('first', n_classes=2, samples_per_class=2)    # 4 samples
+        cls.second = FakeDataset('second', n_classes=3, samples_per_class=2)  # 6 samples
+        cls.multi = MultiDataset([cls.first, cls.second])
+
+    def test_len_and_num_classes(self):
+        self.assertEqual(len(self.multi), len(self.first) + len(self.second))
+        self.assertEqual(
+            self.multi.num_classes(),
+            self.first.num_classes() + self.second.num_classes(),
+            'num_classes() must return the sum over sub-datasets.'
+        )
+
+    def test_index_mapping_boundaries(self):
+        # First and last index of each sub-dataset
+        self.assertEqual(self.multi.index_mapping(0), (0, 0))
+        self.assertEqual(self.multi.index_mapping(len(self.first) - 1), (0, len(self.first) - 1))
+        self.assertEqual(self.multi.index_mapping(len(self.first)), (1, 0))
+        self.assertEqual(self.multi.index_mapping(len(self.multi) - 1), (1, len(self.second) - 1))
+
+    def test_label_mapping(self):
+        global_class_id = self.multi.label_mapping()
+
+        self.assertEqual(global_class_id.dtype, np.int64)
+        self.assertEqual(len(global_class_id), len(self.multi))
+        # First dataset keeps its class ids, the second is offset by first.num_classes()
+        np.testing.assert_array_equal(global_class_id[:len(self.first)], self.first._class_ids)
+        np.testing.assert_array_equal(
+            global_class_id[len(self.first):],
+            self.second._class_ids + self.first.num_classes()
+        )
+        np.testing.assert_array_equal(self.multi.df['class_id'].values, global_class_id)
+
+    def test_getitem_labels(self):
+        # Boundary samples come from the right sub-dataset with the offset label
+        x, y = self.multi[0]
+        self.assertEqual(x[0].item(), 0)
+        self.assertEqual(y, int(self.first._class_ids[0]))
+
+        x, y = self.multi[len(self.first)]
+        self.assertEqual(x[0].item(), 0)
+        self.assertEqual(y, int(self.second._class_ids[0]) + self.first.num_classes())
+
+        x, y = self.multi[len(self.multi) - 1]
+        self.assertEqual(x[0].item(), len(self.second) - 1)
+        self.assertEqual(y, int(self.second._class_ids[-1]) + self.first.num_classes())
+
+
+if __name__ == '__main__':
+    unittest.main()